@@ -0,0 +1,96 @@
+# bench_import_time.py
+# -*- coding: utf-8 -*-
+
+"""
+Import time benchmark of the utils_nm modules, which guards against regressions of the lazy imports.
+Every module is imported in fresh interpreters, the best time of all repetitions is compared against its budget and
+the heavy dependencies, which must not be imported eagerly, are checked in sys.modules.
+Run it from the repository root, it exits with code 1 on a regression:
+
+>>> python benchmarks/bench_import_time.py --repeat 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+
+# ______________________________________________________________________________________________________________________
+
+
+SRC_PATH = Path(__file__).resolve().parents[1] / 'src'
+
+HEAVY_MODULES = (
+    'numpy', 'pandas', 'psutil', 'colorama', 'dateutil', 'sqlalchemy', 'tqdm', 'customtkinter', 'tkinter', 'darkdetect'
+)
+
+# module: (budget in seconds, heavy modules which may be imported)
+BUDGETS = {
+    'utils_nm.util_functions': (0.15, ()),
+    'utils_nm.util_classes': (0.15, ()),
+    'utils_nm.util_decorators': (0.15, ()),
+    'utils_nm.util_context_managers': (0.15, ()),
+    'utils_nm.db_functions': (0.15, ()),
+    'utils_nm.util_gui_classes': (0.15, ()),
+    'utils_nm.orm_models': (0.6, ('sqlalchemy',)),
+}
+
+MEASURE_CODE = '''
+import sys, time, json
+t = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - t, 'modules': [m for m in {heavy} if m in sys.modules]}}))
+'''
+
+
+# ______________________________________________________________________________________________________________________
+
+
+def measure(module: str) -> dict:
+    """
+    imports the module in a fresh interpreter
+
+    Args:
+        module: the dotted module name
+
+    Returns:
+        dict with the import time in seconds and the heavy modules found in sys.modules afterwards
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_PATH), os.environ.get('PYTHONPATH')])))
+    code = MEASURE_CODE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(repeat: int = 5, factor: float = 1.0) -> int:
+    """
+    benchmarks all modules of BUDGETS
+
+    Args:
+        repeat: the number of fresh interpreters per module, the best time counts
+        factor: scales all budgets, e.g. for slow machines
+
+    Returns:
+        the exit code, 1 if any module exceeded its budget or imported a heavy module eagerly
+    """
+    failed = False
+    for module, (budget, allowed) in BUDGETS.items():
+        results = [measure(module) for _ in range(repeat)]
+        best = min(result['seconds'] for result in results)
+        eager = sorted(set(results[0]['modules']) - set(allowed))
+        ok = best <= budget * factor and not eager
+        failed |= not ok
+        print(f'{"ok" if ok else "FAIL":<6}{module:<35}{best * 1000:>8.1f} ms  (budget {budget * factor * 1000:.0f} ms)'
+              + (f'  eagerly imported: {", ".join(eager)}' if eager else ''))
+    return int(failed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='import time benchmark of utils_nm')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--factor', type=float, default=1.0, help='scales all budgets')
+    args = parser.parse_args()
+    sys.exit(main(args.repeat, args.factor))
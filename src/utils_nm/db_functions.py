@@ -5,17 +5,20 @@
 Functions which serve for database purposes
 """
 
+from __future__ import annotations
+
+import typing
 import warnings
 
 from collections import namedtuple
-import pandas as pd
-from tqdm import tqdm
-
-import sqlalchemy as sa
-from sqlalchemy import exc
 
 from .util_functions import input_prompt
 
+# sqlalchemy, pandas and tqdm are imported inside the functions needing them, to keep the module import cheap
+if typing.TYPE_CHECKING:
+    import pandas as pd
+    import sqlalchemy as sa
+
 
 # ______________________________________________________________________________________________________________________
 
@@ -54,6 +57,8 @@ def create_single_db_engine(db_cfg: dict, db_conn_info: dict, db_name: str = Non
         conn_str = db_cfg[db_name]['driver'] + ':///'
     conn_str += str(db_conn_info[db_name])
 
+    import sqlalchemy as sa
+
     engine = sa.create_engine(conn_str)
 
     return DB(db_name=db_name, engine=engine)
@@ -114,6 +119,7 @@ def execute_raw_sql(qry: str | sa.sql.elements.TextClause, con: sa.engine.Connec
     """
 
     if type(qry).__name__ == 'str':
+        import sqlalchemy as sa
         qry = sa.text(qry)
     elif type(qry).__name__ != 'TextClause':
         raise TypeError('argument qry must be either a string or sqlalchemy.text!')
@@ -158,6 +164,8 @@ def loop_insert_df_to_table(
     Returns:
         a list with the indexes of the rows which where NOT inserted due to integrity errors
     """
+    from sqlalchemy import exc
+    from tqdm import tqdm
 
     dup_rows = []
     len_df = len(df)
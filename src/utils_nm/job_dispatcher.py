@@ -0,0 +1,240 @@
+# job_dispatcher.py
+# -*- coding: utf-8 -*-
+
+"""
+Dispatcher which runs the jobs of the job_schedule table and records them in the job_execution table
+"""
+
+import sys
+import heapq
+import shlex
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+
+from .orm_models import JobExec, JobSchedule
+
+
+# ______________________________________________________________________________________________________________________
+
+
+class JobDispatcher:
+    """
+    Runs the active `JobSchedule` rows according to their cron schedule and records every run as `JobExec` row.
+    Due jobs are ordered by `priority` (lower values first, None last) and run as subprocesses
+    `<interpreter of env> <location> <args>` with at most max_workers jobs at the same time.
+    A job is never started while its previous run is still running. Between due times the dispatcher sleeps until
+    the next due time, a finished job or a schedule reload, whichever comes first.
+    Useage:
+
+    >>> dispatcher = JobDispatcher(engine, max_workers=4, log_dir='logs')
+    >>> dispatcher.run()  # blocks until dispatcher.stop() is called from another thread
+    """
+
+    def __init__(
+            self,
+            engine: sa.engine.Engine,
+            max_workers: int = 4,
+            log_dir: Path | str = None,
+            executor: str = 'dispatcher',
+            reload_seconds: int = 300,
+            logger: logging.Logger = None,
+    ):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.log_dir = Path(log_dir) if log_dir is not None else None
+        self.executor = executor
+        self.reload_seconds = reload_seconds
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+
+        self._schedules = {}  # schedule id -> JobSchedule
+        self._upcoming = []  # heap of (next run, priority, schedule id)
+        self._ready = []  # heap of (priority, due time, schedule id)
+        self._running = {}  # schedule id -> Future
+        self._dispatched_until = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    # __________________________________________________________
+    # methods
+
+    @staticmethod
+    def resolve_interpreter(env: str) -> str:
+        """
+        determines the python interpreter from the env column of the schedule
+
+        Args:
+            env: path to a python executable or to an environment directory, if empty the current interpreter is used
+
+        Returns:
+            the path to the python executable
+        """
+        if not env:
+            return sys.executable
+        path = Path(env)
+        if path.is_dir():
+            for candidate in (path / 'bin' / 'python', path / 'python.exe', path / 'Scripts' / 'python.exe'):
+                if candidate.exists():
+                    return str(candidate)
+        return env
+
+    def build_command(self, schedule: JobSchedule) -> list[str]:
+        """builds the subprocess command line of the schedule"""
+        return [self.resolve_interpreter(schedule.env), schedule.location, *shlex.split(schedule.args or '')]
+
+    @staticmethod
+    def _priority(schedule: JobSchedule) -> float:
+        """sort key of the schedule priority, lower values run first, None runs last"""
+        return schedule.priority if schedule.priority is not None else float('inf')
+
+    def load_schedules(self) -> None:
+        """
+        (re)loads the active schedules and plans their next runs after the last dispatched point in time.
+        Schedules with an invalid cron expression are logged and skipped.
+        """
+        self._schedules = {}
+        self._upcoming = []
+        for schedule in JobSchedule.select_filtered(self.engine, active=True):
+            try:
+                next_run = schedule.next_run_after(self._dispatched_until)
+            except ValueError:
+                self.logger.exception(f'skipping job schedule {schedule.name} with invalid cron {schedule.schedule!r}')
+                continue
+            self._schedules[schedule.id] = schedule
+            self._upcoming.append((next_run, self._priority(schedule), schedule.id))
+        heapq.heapify(self._upcoming)
+        self.logger.info(f'loaded {len(self._schedules)} active job schedule(s)')
+
+    def _collect_due(self, now: datetime) -> None:
+        """moves all runs due until now from the upcoming to the ready heap and plans their following runs"""
+        while self._upcoming and self._upcoming[0][0] <= now:
+            due_time, priority, schedule_id = heapq.heappop(self._upcoming)
+            schedule = self._schedules[schedule_id]
+            heapq.heappush(self._upcoming, (schedule.next_run_after(due_time), priority, schedule_id))
+            if schedule_id in self._running or any(item[2] == schedule_id for item in self._ready):
+                self.logger.warning(f'skipping run of {schedule.name} due at {due_time}, previous run still active')
+                continue
+            heapq.heappush(self._ready, (priority, due_time, schedule_id))
+        self._dispatched_until = now
+
+    def _start_ready(self, pool: ThreadPoolExecutor) -> None:
+        """starts ready jobs by priority as long as workers are free"""
+        while self._ready and len(self._running) < self.max_workers:
+            _, due_time, schedule_id = heapq.heappop(self._ready)
+            schedule = self._schedules.get(schedule_id)
+            if schedule is None:  # deactivated since it became due
+                continue
+            future = pool.submit(self.run_job, schedule)
+            future.add_done_callback(lambda _: self._wake.set())
+            self._running[schedule_id] = future
+
+    def _reap_finished(self) -> None:
+        """removes finished jobs from the running jobs and logs unexpected errors"""
+        for schedule_id, future in list(self._running.items()):
+            if future.done():
+                del self._running[schedule_id]
+                if future.exception() is not None:
+                    self.logger.error(f'dispatching job schedule {schedule_id} failed: {future.exception()!r}')
+
+    def run_job(self, schedule: JobSchedule) -> JobExec:
+        """
+        runs the job of the schedule as subprocess and records start, end, status, exception and log file
+
+        Args:
+            schedule: the schedule of the job
+
+        Returns:
+            the finished job execution
+        """
+        start_time = datetime.now()
+        log_file = None
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            log_file = self.log_dir / f'{schedule.name}_{start_time:%Y%m%d_%H%M%S}.log'
+
+        job_exec = JobExec(
+            name=schedule.name,
+            start_time=start_time,
+            running=True,
+            status=JobExec.STATUS_RUNNING,
+            executor=self.executor[:31],
+            log_file=str(log_file) if log_file is not None else None,
+        ).add(self.engine)
+        self.logger.info(f'started {schedule.name} (job execution id {job_exec.id})')
+
+        try:
+            if log_file is not None:
+                with open(log_file, 'a', encoding='utf-8') as f:
+                    process = subprocess.run(self.build_command(schedule), stdout=f, stderr=subprocess.STDOUT)
+            else:
+                process = subprocess.run(
+                    self.build_command(schedule), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+            if process.returncode == 0:
+                status, exception = JobExec.STATUS_SUCCESS, None
+            else:
+                status, exception = JobExec.STATUS_FAILED, f'exit code {process.returncode}'
+        except Exception as ex:
+            status, exception = JobExec.STATUS_FAILED, f'{type(ex).__name__}: {ex}'[:255]
+
+        job_exec.end_time = datetime.now()
+        job_exec.running = False
+        job_exec.status = status
+        job_exec.exception = exception
+        job_exec.update(self.engine)
+        self.logger.info(f'finished {schedule.name} with status {status}')
+
+        return job_exec
+
+    def run(self, until: datetime = None) -> None:
+        """
+        dispatches the jobs until `stop` is called or until the given point in time, then waits for running jobs
+
+        Args:
+            until: (optional) stop dispatching at this point in time
+
+        Returns:
+            None
+        """
+        self._stop.clear()
+        self._dispatched_until = datetime.now()
+        self.load_schedules()
+        next_reload = self._dispatched_until.timestamp() + self.reload_seconds
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job') as pool:
+            while not self._stop.is_set():
+                self._wake.clear()
+                now = datetime.now()
+                if until is not None and now >= until:
+                    break
+                if now.timestamp() >= next_reload:
+                    self.load_schedules()
+                    next_reload = now.timestamp() + self.reload_seconds
+
+                self._reap_finished()
+                self._collect_due(now)
+                self._start_ready(pool)
+
+                # sleep until the next due time, a finished job, a reload or the end, whichever comes first
+                wake_up = next_reload
+                if self._upcoming:
+                    wake_up = min(wake_up, self._upcoming[0][0].timestamp())
+                if until is not None:
+                    wake_up = min(wake_up, until.timestamp())
+                self._wake.wait(timeout=max(0.0, wake_up - datetime.now().timestamp()))
+
+        self._reap_finished()
+        return None
+
+    def stop(self) -> None:
+        """stops dispatching new jobs, `run` returns once the running jobs are finished"""
+        self._stop.set()
+        self._wake.set()
+
+
+# ______________________________________________________________________________________________________________________
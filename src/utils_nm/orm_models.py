@@ -5,9 +5,29 @@
 ORM (Object-Relational-Mapping) objects which serve for database purposes
 """
 
+from __future__ import annotations
+
+import typing
+import functools
+import contextlib
+import contextvars
+import operator
+import atexit
+import logging
+import threading
+
+from datetime import datetime
+
 import sqlalchemy as sa
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .util_classes import CronSchedule, CronTable
+from .util_functions import chunker
+
+# pandas and tqdm are imported inside the methods needing them, to keep the module import cheap
+if typing.TYPE_CHECKING:
+    import pandas as pd
 
 
 # ______________________________________________________________________________________________________________________
@@ -15,12 +35,108 @@ from sqlalchemy.orm.attributes import InstrumentedAttribute
 
 Base = sa.orm.declarative_base()
 
+FILTER_OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'in': lambda col, value: col.in_(value),
+    'notin': lambda col, value: col.not_in(value),
+    'between': lambda col, value: col.between(*value),
+    'like': lambda col, value: col.like(value),
+    'isnull': lambda col, value: col.is_(None) if value else col.is_not(None),
+}
+
+_compiled_cron_table = functools.lru_cache(maxsize=16)(CronTable)
+
+_active_unit_of_work = contextvars.ContextVar('_active_unit_of_work', default=None)
+
+
+# ______________________________________________________________________________________________________________________
+
+
+class UnitOfWork:
+    """
+    A context manager which lets all `BaseClass` operations on the same engine share one session, one connection
+    and one commit. Operations inside the block flush instead of committing, the commit happens on exit
+    (or a rollback, if an exception was raised). Outside of the block the methods keep their own sessions.
+    Useage:
+
+    >>> with UnitOfWork(engine) as uow:
+    >>>     job = JobExec(...).add(engine)
+    >>>     job.status = 'success'
+    >>>     job.update(engine)
+    >>> print(job.id)
+    """
+
+    def __init__(self, engine: sa.engine.Engine):
+        self.engine = engine
+        self.session = None
+        self._token = None
+
+    def __enter__(self):
+        self.session = Session(self.engine, expire_on_commit=False)  # keep the instances accessible after closing
+        self._token = _active_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _active_unit_of_work.reset(self._token)
+        try:
+            if exc_type is None:
+                self.session.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+        return False
+
+
+# ______________________________________________________________________________________________________________________
+
 
 class BaseClass:
     """
     Base class which implements general functionality
     """
 
+    @classmethod
+    @functools.cache
+    def _primary_key_keys(cls) -> tuple[str, ...]:
+        """attribute names of the primary key columns, computed once per mapped class"""
+        return tuple(sa.inspect(cls).get_property_by_column(col).key for col in sa.inspect(cls).primary_key)
+
+    @classmethod
+    @functools.cache
+    def _column_keys(cls) -> tuple[str, ...]:
+        """attribute names of the non primary key columns, computed once per mapped class"""
+        return tuple(
+            attr.key for attr in sa.inspect(cls).column_attrs if attr.key not in cls._primary_key_keys()
+        )
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _session_scope(engine: sa.engine.Engine) -> typing.Generator[Session, None, None]:
+        """
+        provides the session of the active `UnitOfWork` for the engine, else a new session which is committed on exit
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+
+        Returns:
+            generator object yielding the session
+        """
+        unit_of_work = _active_unit_of_work.get()
+        if unit_of_work is not None and unit_of_work.engine is engine:
+            yield unit_of_work.session
+            unit_of_work.session.flush()
+        else:
+            with Session(engine) as session:
+                session.expire_on_commit = False  # keep the instance accessible after session closes
+                yield session
+                session.commit()
+
     @classmethod
     def set_table_attribute(cls, attr_name: str, attr_value: object) -> None:
         """
@@ -47,12 +163,14 @@ class BaseClass:
             recreate: if true drop the existing table and recreate it
 
         Returns:
-            Creates the specified table and returns None
+            Creates the specified table (and its missing indexes, if the table already existed) and returns None
         """
 
         if recreate:
             cls.__table__.drop(engine, checkfirst=True)
         cls.__table__.create(engine, checkfirst=True)
+        for index in cls.__table__.indexes:
+            index.create(engine, checkfirst=True)
 
         return None
 
@@ -67,11 +185,9 @@ class BaseClass:
         Returns:
             list of all object instances
         """
-        with Session(engine) as session:
-            session.expire_on_commit = False  # keep the instance accessible after session closes
+        with cls._session_scope(engine) as session:
             stmt = sa.select(cls)
             rows = session.execute(stmt).all()
-            session.commit()
             rows = [r[0] for r in rows]
 
         return rows
@@ -89,17 +205,237 @@ class BaseClass:
         Returns:
             filtered list of object instances
         """
-        with Session(engine) as session:
-            session.expire_on_commit = False  # keep the instance accessible after session closes
+        with cls._session_scope(engine) as session:
             stmt = sa.select(cls).filter_by(**kwargs)
             if verbose:
                 print(stmt)
             rows = session.execute(stmt).all()
-            session.commit()
             rows = [r[0] for r in rows]
 
         return rows
 
+    @classmethod
+    def _filter_clauses(cls, **kwargs) -> list:
+        """
+        translates lookups of the form `column=value` or `column__operator=value` into sql expressions
+
+        Args:
+            **kwargs: the lookups, available operators are the keys of `FILTER_OPERATORS`
+
+        Returns:
+            list of sqlalchemy boolean expressions
+        """
+        columns = sa.inspect(cls).columns
+        clauses = []
+        for lookup, value in kwargs.items():
+            key, _, op = lookup.partition('__')
+            op = op or 'eq'
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f'operator must be one of [{", ".join(FILTER_OPERATORS)}], but operator was {op}')
+            clauses.append(FILTER_OPERATORS[op](columns[key], value))
+        return clauses
+
+    @classmethod
+    def select_dataframe(
+            cls,
+            engine: sa.engine.Engine,
+            columns: list[str] = None,
+            order_by: list[str] = None,
+            limit: int = None,
+            verbose: bool = False,
+            **kwargs,
+    ) -> pd.DataFrame:
+        """
+        retrieves filtered rows with a core select directly into a dataframe, without creating orm instances
+
+        >>> JobExec.select_dataframe(engine, ['name', 'status'], order_by=['-start_time'], limit=100,
+        >>>                          name__in=['job_a', 'job_b'], start_time__ge=datetime(2024, 1, 1))
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            columns: (optional) names of the columns to select, if None all columns are selected
+            order_by: (optional) names of the columns to order by, prefix a name with '-' for descending order
+            limit: (optional) the maximum number of rows
+            verbose: if true print the generated sql statement
+            **kwargs: lookups of the form `column=value` or `column__operator=value`,
+                        e.g. `start_time__between=(a, b)` or `status__in=['failed', 'killed']`
+
+        Returns:
+            dataframe with the selected rows
+        """
+        table_columns = sa.inspect(cls).columns
+        if columns is None:
+            columns = list(cls._primary_key_keys() + cls._column_keys())
+        stmt = sa.select(*[table_columns[key] for key in columns]).where(*cls._filter_clauses(**kwargs))
+        for key in order_by or []:
+            stmt = stmt.order_by(table_columns[key[1:]].desc() if key.startswith('-') else table_columns[key])
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        if verbose:
+            print(stmt)
+
+        import pandas as pd
+
+        with cls._session_scope(engine) as session:
+            df = pd.read_sql(stmt, session.connection())
+
+        return df
+
+    @classmethod
+    def iter_all(
+            cls,
+            engine: sa.engine.Engine,
+            page_size: int = 1000,
+            columns: list[str] = None,
+    ) -> typing.Generator:
+        """
+        streams all rows page by page using keyset pagination on the primary key
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            page_size: the number of rows fetched per page (and per yield_per batch)
+            columns: (optional) names of the columns to project, if None orm instances are yielded
+
+        Returns:
+            generator object with orm instances or rows of the projected columns
+        """
+        return cls.iter_filtered(engine, page_size=page_size, columns=columns)
+
+    @classmethod
+    def iter_filtered(
+            cls,
+            engine: sa.engine.Engine,
+            page_size: int = 1000,
+            columns: list[str] = None,
+            verbose: bool = False,
+            **kwargs,
+    ) -> typing.Generator:
+        """
+        streams filtered rows page by page using keyset pagination on the primary key.
+        Every page is read with its own short lived session (or within the active `UnitOfWork`),
+        so memory stays flat regardless of the table size.
+        If columns are projected, the primary key columns are always part of the projection.
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            page_size: the number of rows fetched per page (and per yield_per batch)
+            columns: (optional) names of the columns to project, if None orm instances are yielded
+            verbose: if true print the generated sql statement of the first page
+            **kwargs: the key value pairs corresponding to table colum and colum value to filter
+
+        Returns:
+            generator object with filtered orm instances or rows of the projected columns
+        """
+        if page_size < 1:
+            raise ValueError(f'page_size must be a positive integer, but page_size was {page_size}')
+
+        pk_columns = [getattr(cls, key) for key in cls._primary_key_keys()]
+        if columns is None:
+            stmt = sa.select(cls)
+        else:
+            projection = [getattr(cls, col) for col in columns]
+            projection += [col for col in pk_columns if col.key not in columns]
+            stmt = sa.select(*projection)
+        stmt = stmt.filter_by(**kwargs).order_by(*pk_columns).limit(page_size)
+
+        last_key = None
+        while True:
+            page_stmt = stmt
+            if last_key is not None:
+                if len(pk_columns) == 1:
+                    page_stmt = stmt.where(pk_columns[0] > last_key[0])
+                else:
+                    page_stmt = stmt.where(sa.tuple_(*pk_columns) > sa.tuple_(*last_key))
+            if verbose and last_key is None:
+                print(page_stmt)
+
+            with cls._session_scope(engine) as session:
+                result = session.execute(page_stmt.execution_options(yield_per=page_size))
+                n_rows = 0
+                for row in result:
+                    n_rows += 1
+                    item = row[0] if columns is None else row
+                    last_key = tuple(getattr(item, col.key) for col in pk_columns)
+                    yield item
+
+            if n_rows < page_size:
+                break
+
+    @classmethod
+    def bulk_add(cls, engine: sa.engine.Engine, instances: list, batch_size: int = 1000) -> list:
+        """
+        writes many new instances to the database with one executemany insert and one transaction per batch
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            instances: the orm instances to be inserted
+            batch_size: the number of instances inserted per transaction
+
+        Returns:
+            list of the generated primary keys in the order of the instances
+        """
+        column_keys = cls._primary_key_keys() + cls._column_keys()
+        pk_columns = [getattr(cls, key) for key in cls._primary_key_keys()]
+        sorted_returning = engine.dialect.insert_executemany_returning_sort_by_parameter_order
+
+        ids = []
+        for batch in chunker(instances, batch_size):
+            with cls._session_scope(engine) as session:
+                if sorted_returning:
+                    params = [
+                        {key: value for key, value in sa.inspect(instance).dict.items() if key in column_keys}
+                        for instance in batch
+                    ]
+                    # return all columns, so generated keys and defaults are populated on the instances
+                    stmt = sa.insert(cls).returning(
+                        *[getattr(cls, key) for key in column_keys], sort_by_parameter_order=True
+                    )
+                    rows = session.execute(stmt, params).all()
+                    for instance, row in zip(batch, rows):
+                        for key, value in zip(column_keys, row):
+                            setattr(instance, key, value)
+                        # the instance now represents a database row, without being bound to a session
+                        make_transient_to_detached(instance)
+                else:
+                    # dialects without sorted executemany returning fall back to the batched unit of work
+                    session.add_all(batch)
+            for instance in batch:
+                pk = tuple(getattr(instance, col.key) for col in pk_columns)
+                ids.append(pk[0] if len(pk) == 1 else pk)
+
+        return ids
+
+    @classmethod
+    def bulk_update(cls, engine: sa.engine.Engine, instances: list, batch_size: int = 1000) -> None:
+        """
+        updates many instances by primary key with one executemany update and one transaction per batch
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            instances: the orm instances to be updated, their primary keys must be set
+            batch_size: the number of instances updated per transaction
+
+        Returns:
+            None
+        """
+        column_keys = cls._primary_key_keys() + cls._column_keys()
+        pk_keys = cls._primary_key_keys()
+
+        for batch in chunker(instances, batch_size):
+            params = []
+            for instance in batch:
+                values = {key: value for key, value in sa.inspect(instance).dict.items() if key in column_keys}
+                if any(values.get(key) is None for key in pk_keys):
+                    raise ValueError(f'bulk_update requires the primary key to be set, but got {instance}')
+                params.append(values)
+            with cls._session_scope(engine) as session:
+                session.execute(sa.update(cls), params)
+            for instance, values in zip(batch, params):
+                for key, value in values.items():
+                    set_committed_value(instance, key, value)
+
+        return None
+
     def add(self, engine: sa.engine.Engine) -> object:
         """
         writes the current instance to the database
@@ -111,16 +447,16 @@ class BaseClass:
             self
         """
 
-        with Session(engine) as session:
-            session.expire_on_commit = False  # keep the instance accessible after session closes
+        with self._session_scope(engine) as session:
             if self.id is None:
                 session.add(self)
-            session.commit()
         return self
 
     def update(self, engine: sa.engine.Engine) -> None:
         """
-       updates the current instance to the database
+        updates the current instance to the database.
+        Only the attributes modified since the instance was loaded are written, if nothing changed no statement is
+        emitted. Instances which were never loaded (e.g. constructed with a known id) write all their columns.
 
         Args:
             engine: the sqlalchemy engine used to connect to the database
@@ -129,16 +465,25 @@ class BaseClass:
             None
         """
 
-        with Session(engine) as session:
-            session.expire_on_commit = False  # keep the instance accessible after session closes
-            mapped_values = {}
-            primary_keys = [element.name for element in self.__class__.__table__.primary_key]
-            for key, value in self.__class__.__dict__.items():
-                if isinstance(value, InstrumentedAttribute) and key not in primary_keys:
-                    mapped_values[key] = getattr(self, key)
-
+        state = sa.inspect(self)
+        if state.key is None:
+            mapped_values = {key: getattr(self, key) for key in self._column_keys()}
+        else:
+            mapped_values = {
+                key: getattr(self, key) for key in self._column_keys() if state.attrs[key].history.has_changes()
+            }
+            if not mapped_values:
+                return None
+
+        with self._session_scope(engine) as session:
+            if state.session is session:
+                # the instance belongs to the active unit of work, which flushes its modified attributes
+                return None
             session.query(self.__class__).filter(self.__class__.id == self.id).update(mapped_values)
-            session.commit()
+
+        # the written values are the new committed state of the instance
+        for key, value in mapped_values.items():
+            set_committed_value(self, key, value)
         return None
 
 
@@ -150,8 +495,17 @@ class JobExec(Base, BaseClass):
     ORM model for the job_execution table
     """
 
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+
     __tablename__ = 'job_execution'
-    __table_args__ = {'schema': None}
+    __table_args__ = (
+        sa.Index('ix_job_execution_name_start_time', 'name', 'start_time'),
+        sa.Index('ix_job_execution_running_status', 'running', 'status'),
+        sa.Index('ix_job_execution_start_time', 'start_time'),
+        {'schema': None},
+    )
 
     id = sa.Column(sa.Integer, sa.Identity(start=1, cycle=True), primary_key=True)
     name = sa.Column(sa.String(255), nullable=False)
@@ -163,6 +517,260 @@ class JobExec(Base, BaseClass):
     exception = sa.Column(sa.String(255), nullable=True)
     log_file = sa.Column(sa.String(255), nullable=True)
 
+    @classmethod
+    def select_latest_per_job(cls, engine: sa.engine.Engine, names: list[str] = None) -> list[object]:
+        """
+        retrieves the latest execution of every job. The greatest start_time per name is looked up through the
+        (name, start_time) index and joined back to the table, which is supported by all dialects.
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            names: (optional) restrict the result to these job names
+
+        Returns:
+            list of the latest object instance per job name, ordered by name
+        """
+        latest = sa.select(cls.name, sa.func.max(cls.start_time).label('start_time')).group_by(cls.name)
+        if names is not None:
+            latest = latest.where(cls.name.in_(names))
+        latest = latest.subquery()
+        stmt = (
+            sa.select(cls)
+            .join(latest, sa.and_(cls.name == latest.c.name, cls.start_time == latest.c.start_time))
+            .order_by(cls.name, cls.id)
+        )
+        with cls._session_scope(engine) as session:
+            rows = session.execute(stmt).scalars().all()
+
+        # executions of the same job with an identical start_time resolve to the greatest id
+        return list({row.name: row for row in rows}.values())
+
+    @classmethod
+    def select_running(cls, engine: sa.engine.Engine, names: list[str] = None) -> list[object]:
+        """
+        retrieves the currently running executions through the (running, status) index
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            names: (optional) restrict the result to these job names
+
+        Returns:
+            list of running object instances, ordered by start_time
+        """
+        stmt = sa.select(cls).where(cls.running == sa.true())
+        if names is not None:
+            stmt = stmt.where(cls.name.in_(names))
+        with cls._session_scope(engine) as session:
+            rows = session.execute(stmt.order_by(cls.start_time)).scalars().all()
+
+        return rows
+
+    @classmethod
+    def select_in_window(
+            cls,
+            engine: sa.engine.Engine,
+            start: datetime,
+            end: datetime,
+            names: list[str] = None,
+    ) -> list[object]:
+        """
+        retrieves the executions which started in the half open interval [start, end) as index range scan
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            start: the inclusive lower bound of start_time
+            end: the exclusive upper bound of start_time
+            names: (optional) restrict the result to these job names
+
+        Returns:
+            list of object instances, ordered by start_time
+        """
+        stmt = sa.select(cls).where(cls.start_time >= start, cls.start_time < end)
+        if names is not None:
+            stmt = stmt.where(cls.name.in_(names))
+        with cls._session_scope(engine) as session:
+            rows = session.execute(stmt.order_by(cls.start_time)).scalars().all()
+
+        return rows
+
+    @classmethod
+    def apply_retention(
+            cls,
+            engine: sa.engine.Engine,
+            cutoff: datetime,
+            archive: bool = True,
+            batch_size: int = 10000,
+            verbose: bool = False,
+    ) -> int:
+        """
+        moves the finished executions which started before the cutoff to the `JobExecArchive` table and deletes them.
+        The rows are processed in primary key ranges of batch_size with one short transaction per range,
+        so no long locks or giant transactions are needed. Running executions are never touched.
+        The archive table is placed in the schema of the job execution table (see `set_table_attribute`).
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            cutoff: executions with a start_time before the cutoff are pruned
+            archive: if false the rows are only deleted, without copying them to the archive table
+            batch_size: the width of the primary key range processed per transaction
+            verbose: whether to show a loop progress bar and print statements
+
+        Returns:
+            the number of pruned rows
+        """
+        table = cls.__table__
+        JobExecArchive.set_table_attribute('schema', table.schema)
+        archive_table = JobExecArchive.__table__
+        condition = sa.and_(table.c.start_time < cutoff, table.c.running == sa.false())
+
+        if archive:
+            JobExecArchive.create_table(engine)
+        stmt = sa.select(sa.func.min(table.c.id), sa.func.max(table.c.id)).where(condition)
+        with engine.connect() as con:
+            min_id, max_id = con.execute(stmt).one()
+        if min_id is None:
+            return 0
+
+        n_pruned = 0
+        sequence = range(min_id, max_id + 1, batch_size)
+        if verbose:
+            from tqdm import tqdm
+            sequence = tqdm(sequence)
+        for lower_id in sequence:
+            batch_condition = sa.and_(condition, table.c.id >= lower_id, table.c.id < lower_id + batch_size)
+            with engine.begin() as con:
+                if archive:
+                    con.execute(
+                        archive_table.insert().from_select(
+                            [col.name for col in table.c], sa.select(*table.c).where(batch_condition)
+                        )
+                    )
+                n_pruned += con.execute(table.delete().where(batch_condition)).rowcount
+        if verbose:
+            print(f'{n_pruned} row(s) {"archived" if archive else "deleted"}')
+
+        return n_pruned
+
+    @classmethod
+    def duration_statistics(
+            cls,
+            engine: sa.engine.Engine,
+            bucket: typing.Literal['hour', 'day', 'week', 'month'] = 'day',
+            start: datetime = None,
+            end: datetime = None,
+            names: list[str] = None,
+            chunk_size: int = 100000,
+    ) -> pd.DataFrame:
+        """
+        aggregates the executions per job name and time bucket to runs, failures, failure rate, runs per day and the
+        p50, p95 and max duration in seconds. On PostgreSQL the aggregation runs in the database with percentile_cont,
+        other dialects stream only the needed columns in chunks and merge the aggregates of every chunk with pandas,
+        only the durations of the finished executions (one float per row) are kept for the quantiles.
+        Running executions count as runs, but not to the durations.
+
+        Args:
+            engine: the sqlalchemy engine used to connect to the database
+            bucket: the time bucket of start_time, weeks start on monday
+            start: (optional) the inclusive lower bound of start_time
+            end: (optional) the exclusive upper bound of start_time
+            names: (optional) restrict the result to these job names
+            chunk_size: the number of rows per chunk of the pandas fallback
+
+        Returns:
+            dataframe with one row per job name and bucket
+        """
+        import numpy as np
+        import pandas as pd
+
+        if bucket not in ('hour', 'day', 'week', 'month'):
+            raise ValueError(f'bucket must be one of [ hour | day | week | month ], but bucket was {bucket}')
+
+        conditions = []
+        if start is not None:
+            conditions.append(cls.start_time >= start)
+        if end is not None:
+            conditions.append(cls.start_time < end)
+        if names is not None:
+            conditions.append(cls.name.in_(names))
+        columns = ['name', 'bucket', 'runs', 'failures', 'p50_seconds', 'p95_seconds', 'max_seconds']
+
+        if engine.dialect.name == 'postgresql':
+            # inline the (validated) bucket, so select and group by render the identical expression
+            bucket_column = sa.func.date_trunc(sa.literal_column(f"'{bucket}'"), cls.start_time).label('bucket')
+            duration = sa.extract('epoch', cls.end_time - cls.start_time)
+            stmt = (
+                sa.select(
+                    cls.name,
+                    bucket_column,
+                    sa.func.count().label('runs'),
+                    sa.func.sum(sa.case((cls.status == cls.STATUS_FAILED, 1), else_=0)).label('failures'),
+                    sa.func.percentile_cont(0.5).within_group(duration).label('p50_seconds'),
+                    sa.func.percentile_cont(0.95).within_group(duration).label('p95_seconds'),
+                    sa.func.max(duration).label('max_seconds'),
+                )
+                .where(*conditions)
+                .group_by(cls.name, bucket_column)
+                .order_by(cls.name, bucket_column)
+            )
+            with engine.connect() as con:
+                df = pd.read_sql(stmt, con)
+        else:
+            stmt = sa.select(cls.name, cls.start_time, cls.end_time, cls.status).where(*conditions)
+            totals = None  # runs, failures and max_seconds per name and bucket, merged chunk by chunk
+            durations = {}  # (name, bucket) -> arrays of the durations of finished executions, for the quantiles
+            with engine.connect() as con:
+                con = con.execution_options(stream_results=True)
+                for chunk in pd.read_sql(stmt, con, chunksize=chunk_size, parse_dates=['start_time', 'end_time']):
+                    if chunk.empty:
+                        continue
+                    keys = [chunk['name'], cls._bucket_start(chunk['start_time'], bucket).rename('bucket')]
+                    duration = (chunk['end_time'] - chunk['start_time']).dt.total_seconds()
+                    partial = pd.DataFrame({
+                        'runs': 1,
+                        'failures': chunk['status'] == cls.STATUS_FAILED,
+                        'max_seconds': duration,
+                    }).groupby(keys).agg({'runs': 'sum', 'failures': 'sum', 'max_seconds': 'max'})
+                    if totals is not None:
+                        partial = pd.concat([totals, partial]).groupby(level=['name', 'bucket']).agg(
+                            {'runs': 'sum', 'failures': 'sum', 'max_seconds': 'max'}
+                        )
+                    totals = partial
+
+                    finished = duration.notna()
+                    for key, values in duration[finished].groupby([key[finished] for key in keys]):
+                        durations.setdefault(key, []).append(values.to_numpy())
+            if totals is None:
+                return pd.DataFrame(columns=columns + ['failure_rate', 'runs_per_day'])
+
+            totals[['p50_seconds', 'p95_seconds']] = [
+                np.quantile(np.concatenate(durations[key]), [0.5, 0.95]) if key in durations else [np.nan, np.nan]
+                for key in totals.index
+            ]
+            df = totals.reset_index()[columns]
+
+        df['failure_rate'] = df['failures'] / df['runs']
+        bucket_days = {'hour': 1 / 24, 'day': 1, 'week': 7}
+        if bucket == 'month':
+            days = pd.to_datetime(df['bucket']).dt.days_in_month
+        else:
+            days = bucket_days[bucket]
+        df['runs_per_day'] = df['runs'] / days
+
+        return df
+
+    @staticmethod
+    def _bucket_start(start_time: pd.Series, bucket: str) -> pd.Series:
+        """truncates the timestamps to the start of their hour, day, week (monday) or month"""
+        import pandas as pd
+
+        if bucket == 'hour':
+            return start_time.dt.floor(pd.Timedelta(hours=1))
+        elif bucket == 'day':
+            return start_time.dt.normalize()
+        elif bucket == 'week':
+            return (start_time - pd.to_timedelta(start_time.dt.weekday, unit='D')).dt.normalize()
+        return start_time.dt.to_period('M').dt.to_timestamp()
+
     def __repr__(self):
         return f'JobExec(id={self.id}, name={self.name}, start_time={self.start_time}, status={self.status})'
 
@@ -170,6 +778,34 @@ class JobExec(Base, BaseClass):
 # ______________________________________________________________________________________________________________________
 
 
+class JobExecArchive(Base, BaseClass):
+    """
+    ORM model for the job_execution_archive table, which holds the rows pruned by `JobExec.apply_retention`
+    """
+
+    __tablename__ = 'job_execution_archive'
+    __table_args__ = (
+        sa.Index('ix_job_execution_archive_name_start_time', 'name', 'start_time'),
+        {'schema': None},
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=False)
+    name = sa.Column(sa.String(255), nullable=False)
+    start_time = sa.Column(sa.DateTime, nullable=False)
+    end_time = sa.Column(sa.DateTime, nullable=True)
+    status = sa.Column(sa.String(255), nullable=True)
+    running = sa.Column(sa.Boolean, nullable=False)
+    executor = sa.Column(sa.String(31), nullable=False)
+    exception = sa.Column(sa.String(255), nullable=True)
+    log_file = sa.Column(sa.String(255), nullable=True)
+
+    def __repr__(self):
+        return f'JobExecArchive(id={self.id}, name={self.name}, start_time={self.start_time}, status={self.status})'
+
+
+# ______________________________________________________________________________________________________________________
+
+
 class JobSchedule(Base, BaseClass):
     """
     ORM model for the job_schedule table
@@ -187,6 +823,51 @@ class JobSchedule(Base, BaseClass):
     priority = sa.Column(sa.SmallInteger, nullable=True)
     active = sa.Column(sa.Boolean, default=True, nullable=False)
 
+    @property
+    def cron(self) -> CronSchedule:
+        """the compiled cron schedule, every distinct schedule string is only parsed once per process"""
+        return CronSchedule.from_string(self.schedule)
+
+    def next_run_after(self, t: datetime) -> datetime:
+        """
+        calculates the first run of the job strictly after t
+
+        Args:
+            t: the point in time
+
+        Returns:
+            the datetime of the next run
+        """
+        return self.cron.next_run_after(t)
+
+    def runs_between(self, start: datetime, end: datetime) -> typing.Generator:
+        """
+        creates a generator of all runs of the job in the half open interval [start, end)
+
+        Args:
+            start: the inclusive lower bound
+            end: the exclusive upper bound
+
+        Returns:
+            generator object of run datetimes
+        """
+        return self.cron.runs_between(start, end)
+
+    @staticmethod
+    def due_at(schedules: list, t: datetime) -> list:
+        """
+        evaluates many schedules in one vectorized pass over their compiled bitsets
+
+        Args:
+            schedules: the JobSchedule instances, e.g. from `JobSchedule.select_filtered(engine, active=True)`
+            t: the point in time
+
+        Returns:
+            list of the JobSchedule instances which are due at the minute of t
+        """
+        due = _compiled_cron_table(tuple(schedule.schedule for schedule in schedules)).due_at(t)
+        return [schedule for schedule, is_due in zip(schedules, due) if is_due]
+
     def __repr__(self):
         schedule = zip(self.schedule.split(), ['minute', 'hour', 'day', 'month', 'weekday'])
         schedule = ', '.join([f'{j}={i}' for i, j in schedule])
@@ -194,3 +875,148 @@ class JobSchedule(Base, BaseClass):
 
 
 # ______________________________________________________________________________________________________________________
+
+
+class JobExecWriter:
+    """
+    Buffers status changes of job executions and writes them from a background thread, so a slow database does not
+    stall the job itself. Multiple changes of the same row are coalesced into one update, pending changes are written
+    in one bulk update by primary key every flush_seconds or as soon as max_pending rows are pending.
+    If the database is unreachable, the changes are kept and retried on the next flush. If single rows fail
+    (e.g. an unknown primary key), the batch is retried row by row and only the failing rows are logged and dropped.
+    The pending changes are flushed on `close`, when leaving the context manager and at interpreter exit.
+    Useage:
+
+    >>> with JobExecWriter(engine) as writer:
+    >>>     writer.submit(job_exec, status='step 2 of 5')
+    >>>     writer.submit(job_exec, running=False, status=JobExec.STATUS_SUCCESS, end_time=datetime.now())
+    """
+
+    # errors of the connection rather than of single rows, the changes are kept and retried on the next flush
+    TRANSIENT_ERRORS = (sa.exc.OperationalError, sa.exc.InterfaceError)
+
+    def __init__(
+            self,
+            engine: sa.engine.Engine,
+            flush_seconds: float = 1.0,
+            max_pending: int = 500,
+            model: type = None,
+            logger: logging.Logger = None,
+    ):
+        self.engine = engine
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.model = model if model is not None else JobExec
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+
+        self._pending = {}  # primary key -> column values
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._work, name='JobExecWriter', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def submit(self, job_exec: object | int, **values) -> None:
+        """
+        queues column values of a job execution to be written
+
+        Args:
+            job_exec: the orm instance or its primary key. An instance is updated in memory right away, it must have
+                        been written to the database before, i.e. its primary key must be set
+            **values: the column names and their new values
+
+        Returns:
+            None
+        """
+        if self._closed:
+            raise RuntimeError('JobExecWriter is already closed')
+
+        pk = job_exec.id if isinstance(job_exec, self.model) else job_exec
+        if pk is None:
+            raise ValueError(f'JobExecWriter.submit requires the primary key to be set, but got {job_exec}')
+
+        if isinstance(job_exec, self.model):
+            for key, value in values.items():
+                # the value will be written by the writer, so it must not count as modification for `update`
+                set_committed_value(job_exec, key, value)
+
+        with self._lock:
+            self._pending.setdefault(pk, {}).update(values)
+            n_pending = len(self._pending)
+        if n_pending >= self.max_pending:
+            self._flush_requested.set()
+
+        return None
+
+    def flush(self) -> None:
+        """writes all pending changes right away in the calling thread"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return None
+
+            try:
+                self._write(pending)
+            except self.TRANSIENT_ERRORS:
+                self._requeue(pending)
+                raise
+            except Exception:
+                # a single bad row fails the whole executemany, so retry row by row and drop only the failing rows
+                rows = list(pending.items())
+                for i, (pk, values) in enumerate(rows):
+                    try:
+                        self._write({pk: values})
+                    except self.TRANSIENT_ERRORS:
+                        self._requeue(dict(rows[i:]))
+                        raise
+                    except Exception:
+                        self.logger.exception(f'dropping the changes {values} of job execution {pk}, writing failed')
+
+        return None
+
+    def _write(self, pending: dict) -> None:
+        """writes the changes by primary key with one bulk update in one transaction"""
+        pk_key = self.model._primary_key_keys()[0]
+        with Session(self.engine) as session:
+            session.execute(sa.update(self.model), [{pk_key: pk, **values} for pk, values in pending.items()])
+            session.commit()
+
+    def _requeue(self, pending: dict) -> None:
+        """keeps the changes for the next flush, without overwriting newer submissions"""
+        with self._lock:
+            for pk, values in pending.items():
+                self._pending[pk] = {**values, **self._pending.get(pk, {})}
+
+    def _work(self) -> None:
+        """the background loop which flushes on the timer or when requested"""
+        while not self._closed:
+            self._flush_requested.wait(timeout=self.flush_seconds)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.logger.exception('writing the pending job execution changes failed, retrying on next flush')
+
+    def close(self) -> None:
+        """stops the background thread and writes the remaining changes"""
+        if self._closed:
+            return None
+        self._closed = True
+        self._flush_requested.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+        return None
+
+
+# ______________________________________________________________________________________________________________________
@@ -5,7 +5,11 @@
 Classes which serve for general purposes
 """
 
+from __future__ import annotations
+
 import time
+import json
+import typing
 
 import logging
 
@@ -13,6 +17,13 @@ import ssl
 import smtplib
 from email.message import EmailMessage
 
+import functools
+from datetime import datetime, timedelta
+
+# numpy is imported inside the methods needing it, to keep the module import cheap
+if typing.TYPE_CHECKING:
+    import numpy as np
+
 
 # ______________________________________________________________________________________________________________________
 
@@ -32,13 +43,111 @@ class StartTime:
 # ______________________________________________________________________________________________________________________
 
 
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats every log record as one json object per line with the fields time (ISO 8601 with milliseconds and utc
+    offset, unless datefmt is given), level, module and message, plus exception and stack if present.
+    Useage:
+
+    >>> handler.setFormatter(JsonLinesFormatter())
+    """
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        return datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds')
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ______________________________________________________________________________________________________________________
+
+
 class Email:
+    """
+    Sends emails over smtp. Within a with block the (authenticated) connection is opened once and reused for all
+    messages, a connection closed by the server is reopened once per message. Outside of a with block every
+    message opens its own connection, `send_many` always sends its batch over one connection.
+    Useage:
+
+    >>> with Email(server, port, address, password, logger) as email:
+    >>>     email.send_email('a@b.com', 'subject', 'body')
+    >>>     failed = email.send_many([{'mail_to': 'c@d.com', 'subject': 'subject', 'body': 'body'}])
+    """
+
     def __init__(self, server: str, port: int, address: str, password: str | None, logger: logging.Logger):
         self.server = server
         self.port = port
         self.address = address
         self.password = password
         self.logger = logger
+        self._connection = None
+        self._connection_use_ssl = None
+        self._keep_open = False
+
+    def __enter__(self):
+        self._keep_open = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._keep_open = False
+        self.close()
+
+    @staticmethod
+    @functools.cache
+    def _ssl_context() -> ssl.SSLContext:
+        """the default ssl context, created once, as loading the certificates is expensive"""
+        return ssl.create_default_context()
+
+    def connect(self, use_ssl: bool = True) -> smtplib.SMTP:
+        """
+        opens the connection to the server, or returns the open connection if it uses the same use_ssl setting
+
+        Args:
+            use_ssl: whether to use a secure ssl connection and authentication, ignored for localhost
+
+        Returns:
+            the smtp connection
+        """
+        if self._connection is not None and self._connection_use_ssl == use_ssl:
+            return self._connection
+        self.close()
+
+        if self.server != 'localhost' and use_ssl:
+            connection = smtplib.SMTP_SSL(self.server, self.port, context=self._ssl_context())
+            try:
+                connection.login(self.address, self.password)
+            except Exception:
+                connection.close()
+                raise
+        else:
+            connection = smtplib.SMTP(self.server, self.port)
+        self._connection, self._connection_use_ssl = connection, use_ssl
+        return connection
+
+    def close(self) -> None:
+        """closes the connection to the server, if one is open"""
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except smtplib.SMTPServerDisconnected:
+                pass
+            finally:
+                self._connection = None
 
     def send_email(
             self, mail_to: str | list, subject: str, body: str, html: bool = False, use_ssl: bool = True
@@ -60,33 +169,436 @@ class Email:
             mail_to = ', '.join(mail_to)
 
         if self.server == 'localhost':
-            with smtplib.SMTP(self.server, self.port) as server:
-                message = f'Subject: {subject}\n\n{body}'
-                try:
-                    server.sendmail(self.address, mail_to, message)
-                    return None
-                except smtplib.SMTPException as ex:
-                    self.logger.exception('an error occurred!')
-                    raise ex
+            message = f'Subject: {subject}\n\n{body}'
         else:
-            mail = EmailMessage()
-            mail['Subject'] = subject
-            mail['From'] = self.address
-            mail['To'] = mail_to
+            message = EmailMessage()
+            message['Subject'] = subject
+            message['From'] = self.address
+            message['To'] = mail_to
             if html:
-                mail.add_alternative(body, subtype='html')
+                message.add_alternative(body, subtype='html')
             else:
-                mail.set_content(body)
+                message.set_content(body)
 
-        if use_ssl:
-            with smtplib.SMTP_SSL(self.server, self.port, context=ssl.create_default_context()) as server:
-                server.login(self.address, self.password)
-                server.send_message(mail)
-        else:
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.send_message(mail)
+        try:
+            for attempt in range(2):
+                connection = self.connect(use_ssl)
+                try:
+                    if isinstance(message, str):
+                        connection.sendmail(self.address, mail_to, message)
+                    else:
+                        connection.send_message(message)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    # the server closed the reused connection (e.g. idle timeout), reconnect once
+                    self._connection = None
+                    if attempt > 0:
+                        raise
+        except smtplib.SMTPException as ex:
+            self.logger.exception('an error occurred!')
+            raise ex
+        finally:
+            if not self._keep_open:
+                self.close()
 
         return None
 
+    def send_many(self, messages: typing.Iterable[dict], use_ssl: bool = True) -> list:
+        """
+        sends a batch of emails over one (authenticated) connection
+
+        Args:
+            messages: the emails as dicts with the keyword arguments of `send_email`: mail_to, subject, body and
+                        optional html
+            use_ssl: whether to use a secure ssl connection and authentication
+
+        Returns:
+            a list with the indexes of the messages which where NOT sent due to smtp errors. If the login fails or the
+            server is not reachable, the batch is stopped and the current and all remaining messages count as failed
+        """
+        failed = []
+        keep_open = self._keep_open
+        self._keep_open = True
+        messages = iter(messages)
+        try:
+            for i, message in enumerate(messages):
+                try:
+                    self.send_email(**message, use_ssl=use_ssl)
+                except smtplib.SMTPAuthenticationError:
+                    # every further message would only repeat the failed login against the server
+                    failed.extend(range(i, i + 1 + sum(1 for _ in messages)))
+                    break
+                except smtplib.SMTPException:
+                    failed.append(i)
+                except OSError:
+                    self.logger.exception('connecting to the smtp server failed')
+                    failed.extend(range(i, i + 1 + sum(1 for _ in messages)))
+                    break
+        finally:
+            self._keep_open = keep_open
+            if not keep_open:
+                self.close()
+
+        if len(failed) > 0:
+            self.logger.warning(f'{len(failed)} email(s) could not be sent')
+        return failed
+
+
+# ______________________________________________________________________________________________________________________
+
+
+class CronSchedule:
+    """
+    A compiled five field cron expression (minute, hour, day, month, weekday).
+    Every field is stored as bitset, so matching a point in time costs a few bit operations.
+    Supported syntax per field: `*`, values, ranges `a-b`, steps `*/n` and `a-b/n`, lists `a,b` as well as
+    month (jan-dec) and weekday (sun-sat) names. Weekday 0 and 7 are sunday. Like cron, if both day and weekday are
+    restricted, a point in time matches if either of them matches.
+    Useage:
+
+    >>> cron = CronSchedule.from_string('*/15 8-18 * * mon-fri')
+    >>> cron.next_run_after(datetime.now())
+    """
+
+    FIELDS = (
+        # name, lowest value, highest value, value names
+        ('minute', 0, 59, ()),
+        ('hour', 0, 23, ()),
+        ('day', 1, 31, ()),
+        ('month', 1, 12, ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')),
+        ('weekday', 0, 7, ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat')),
+    )
+    MAX_SEARCH_DAYS = 366 * 8  # covers schedules like feb 29th on a given weekday
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'cron expression needs 5 fields, but expression was {expression}')
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(field, *spec) for field, spec in zip(fields, self.FIELDS)
+        )
+        # weekday 7 is sunday as well
+        self.weekdays = (self.weekdays | (self.weekdays >> 7)) & 0b1111111
+        self.day_star = fields[2].startswith('*')
+        self.weekday_star = fields[4].startswith('*')
+
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
+    def from_string(cls, expression: str) -> 'CronSchedule':
+        """returns the compiled schedule for the expression, every distinct expression is only parsed once"""
+        return cls(expression)
+
+    @staticmethod
+    def _parse_field(field: str, name: str, low: int, high: int, value_names: tuple) -> int:
+        """
+        parses one cron field to a bitset, where bit i is set if value i is allowed
+
+        Args:
+            field: the cron field, e.g. '1-5', '*/10' or 'mon,wed'
+            name: the name of the field for error messages
+            low: the lowest allowed value
+            high: the highest allowed value
+            value_names: the names of the values starting at the value 0 (weekday) or 1 (month)
+
+        Returns:
+            the bitset as integer
+        """
+        offset = 1 if name == 'month' else 0
+
+        def to_value(token: str) -> int:
+            token = token.lower()
+            if token in value_names:
+                return value_names.index(token) + offset
+            return int(token)
+
+        bits = 0
+        for part in field.split(','):
+            expr, has_step, step = part.partition('/')
+            step = int(step) if has_step else 1
+            if expr == '*':
+                start, end = low, high
+            elif '-' in expr:
+                start, end = (to_value(token) for token in expr.split('-', 1))
+            else:
+                start = to_value(expr)
+                end = high if has_step else start
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f'invalid cron {name} field: {field}')
+            for value in range(start, end + 1, step):
+                bits |= 1 << value
+
+        return bits
+
+    @staticmethod
+    def _next_bit(bits: int, start: int) -> int | None:
+        """returns the position of the lowest set bit at or above start, None if there is none"""
+        remaining = bits >> start
+        if not remaining:
+            return None
+        return start + (remaining & -remaining).bit_length() - 1
+
+    def matches_day(self, t: datetime) -> bool:
+        """whether the schedule runs on the day of t"""
+        if not self.months >> t.month & 1:
+            return False
+        day_match = bool(self.days >> t.day & 1)
+        weekday_match = bool(self.weekdays >> ((t.weekday() + 1) % 7) & 1)
+        if self.day_star or self.weekday_star:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def matches(self, t: datetime) -> bool:
+        """whether the schedule runs at the minute of t"""
+        return bool(self.minutes >> t.minute & 1) and bool(self.hours >> t.hour & 1) and self.matches_day(t)
+
+    def _search(self, start: datetime) -> datetime:
+        """finds the first run at or after start, which must be truncated to the minute"""
+        day = start
+        for _ in range(self.MAX_SEARCH_DAYS):
+            if self.matches_day(day):
+                hour = self._next_bit(self.hours, day.hour)
+                while hour is not None:
+                    minute = self._next_bit(self.minutes, day.minute if hour == day.hour else 0)
+                    if minute is not None:
+                        return day.replace(hour=hour, minute=minute)
+                    hour = self._next_bit(self.hours, hour + 1)
+            day = day.replace(hour=0, minute=0) + timedelta(days=1)
+
+        raise ValueError(f'cron expression {self.expression} never runs')
+
+    def next_run_after(self, t: datetime) -> datetime:
+        """
+        calculates the first run strictly after t
+
+        Args:
+            t: the point in time
+
+        Returns:
+            the datetime of the next run
+        """
+        return self._search(t.replace(second=0, microsecond=0) + timedelta(minutes=1))
+
+    def runs_between(self, start: datetime, end: datetime) -> typing.Generator:
+        """
+        creates a generator of all runs in the half open interval [start, end)
+
+        Args:
+            start: the inclusive lower bound
+            end: the exclusive upper bound
+
+        Returns:
+            generator object of run datetimes
+        """
+        t = start.replace(second=0, microsecond=0)
+        if t < start:
+            t += timedelta(minutes=1)
+        while t < end:
+            t = self._search(t)
+            if t >= end:
+                break
+            yield t
+            t += timedelta(minutes=1)
+
+    def __repr__(self):
+        return f'CronSchedule({self.expression!r})'
+
+
+# ______________________________________________________________________________________________________________________
+
+
+class CronTable:
+    """
+    Many compiled cron schedules stored as numpy bitset arrays, which are evaluated together in one vectorized pass.
+    Useage:
+
+    >>> table = CronTable(['*/5 * * * *', '0 6 * * mon'])
+    >>> due = table.due_at(datetime.now())  # boolean array, one element per schedule
+    """
+
+    def __init__(self, expressions: typing.Iterable[str]):
+        import numpy as np
+
+        self.schedules = [CronSchedule.from_string(expression) for expression in expressions]
+        self.minutes = np.array([cron.minutes for cron in self.schedules], dtype=np.uint64)
+        self.hours = np.array([cron.hours for cron in self.schedules], dtype=np.uint32)
+        self.days = np.array([cron.days for cron in self.schedules], dtype=np.uint32)
+        self.months = np.array([cron.months for cron in self.schedules], dtype=np.uint16)
+        self.weekdays = np.array([cron.weekdays for cron in self.schedules], dtype=np.uint8)
+        self.day_or_weekday_star = np.array(
+            [cron.day_star or cron.weekday_star for cron in self.schedules], dtype=bool
+        )
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def due_at(self, t: datetime) -> np.ndarray:
+        """
+        evaluates all schedules for the minute of t
+
+        Args:
+            t: the point in time
+
+        Returns:
+            boolean array, True where the schedule runs at the minute of t
+        """
+        import numpy as np
+
+        day_match = (self.days >> np.uint32(t.day)) & 1 == 1
+        weekday_match = (self.weekdays >> np.uint8((t.weekday() + 1) % 7)) & 1 == 1
+        return (
+            ((self.minutes >> np.uint64(t.minute)) & 1 == 1)
+            & ((self.hours >> np.uint32(t.hour)) & 1 == 1)
+            & ((self.months >> np.uint16(t.month)) & 1 == 1)
+            & np.where(self.day_or_weekday_star, day_match & weekday_match, day_match | weekday_match)
+        )
+
+    def next_runs_after(self, t: datetime) -> list[datetime]:
+        """
+        calculates the first run strictly after t for every schedule
+
+        Args:
+            t: the point in time
+
+        Returns:
+            list of datetimes, one element per schedule
+        """
+        return [cron.next_run_after(t) for cron in self.schedules]
+
+
+# ______________________________________________________________________________________________________________________
+
+
+class MultiMap:
+    """
+    A compact, read only mapping of keys to multiple values in a CSR like layout: the distinct keys, one flat array
+    with the values of all keys grouped by key and an offsets array, so key i owns values[offsets[i]:offsets[i + 1]].
+    Optionally every value carries a sub key, then the entry of a key is the mapping sub key -> value.
+    No per key containers are materialized, lookups return array views (or a small dict for sub keys).
+    Useage:
+
+    >>> mm = MultiMap.from_pairs(keys=['a', 'b', 'a'], values=[1, 2, 3])
+    >>> mm['a']  # array([1, 3])
+    >>> mm.inverse()[3]  # array(['a'], dtype=object)
+    """
+
+    def __init__(
+            self,
+            keys: list,
+            offsets: np.ndarray,
+            values: np.ndarray,
+            sub_keys: np.ndarray = None,
+            positions: dict = None,
+    ):
+        self.keys = keys
+        self._positions = positions if positions is not None else dict(zip(keys, range(len(keys))))
+        self.offsets = offsets
+        self.values = values
+        self.sub_keys = sub_keys
+
+    @staticmethod
+    def _to_array(items: typing.Iterable) -> np.ndarray:
+        """converts items to a numeric array if possible, else to a one dimensional object array"""
+        import numpy as np
+
+        if isinstance(items, np.ndarray) and items.ndim == 1:
+            return items
+        items = items if isinstance(items, typing.Sized) else list(items)
+        first = next(iter(items), None)
+        if isinstance(first, (int, float, np.number)) and not isinstance(first, bool):
+            kind = type(first)
+            if all(type(item) is kind for item in items):
+                try:
+                    return np.fromiter(items, dtype=np.asarray(first).dtype, count=len(items))
+                except OverflowError:
+                    pass
+        return np.fromiter(items, dtype=object, count=len(items))
+
+    @classmethod
+    def from_pairs(cls, keys: typing.Iterable, values: typing.Iterable, sub_keys: typing.Iterable = None) -> 'MultiMap':
+        """
+        builds the multimap from parallel sequences of keys, values and optional sub keys
+
+        Args:
+            keys: the key of every value
+            values: the values
+            sub_keys: (optional) the sub key of every value
+
+        Returns:
+            MultiMap instance, the keys are ordered by first appearance and the values keep their order per key
+        """
+        import numpy as np
+
+        positions = {}
+        codes = np.fromiter((positions.setdefault(key, len(positions)) for key in keys), dtype=np.int64)
+        order = np.argsort(codes, kind='stable')
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(positions)), out=offsets[1:])
+
+        return cls(
+            keys=list(positions),
+            offsets=offsets,
+            values=cls._to_array(values)[order],
+            sub_keys=cls._to_array(sub_keys)[order] if sub_keys is not None else None,
+            positions=positions,
+        )
+
+    def _entry(self, position: int) -> np.ndarray | dict:
+        """returns the values (or the sub key -> value mapping) of the key at position"""
+        start, end = self.offsets[position], self.offsets[position + 1]
+        if self.sub_keys is None:
+            return self.values[start:end]
+        return dict(zip(self.sub_keys[start:end], self.values[start:end]))
+
+    def __getitem__(self, key):
+        return self._entry(self._positions[key])
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def items(self) -> typing.Generator:
+        """generator object of (key, entry) pairs"""
+        return ((key, self._entry(position)) for position, key in enumerate(self.keys))
+
+    def counts(self) -> np.ndarray:
+        """the number of values per key"""
+        import numpy as np
+
+        return np.diff(self.offsets)
+
+    def inverse(self) -> 'MultiMap':
+        """
+        inverts the multimap: values map to their keys, or with sub keys, the key hierarchy is swapped,
+        i.e. sub key -> {key: value}
+
+        Returns:
+            new MultiMap instance
+        """
+        import numpy as np
+
+        keys = np.repeat(np.fromiter(self.keys, dtype=object, count=len(self.keys)), self.counts())
+        if self.sub_keys is None:
+            return self.from_pairs(keys=self.values, values=keys)
+        return self.from_pairs(keys=self.sub_keys, values=self.values, sub_keys=keys)
+
+    def to_dict(self) -> dict:
+        """materializes the multimap as dict of lists (or dict of dicts for sub keys)"""
+        if self.sub_keys is None:
+            return {key: entry.tolist() for key, entry in self.items()}
+        return dict(self.items())
+
+    def __repr__(self):
+        return f'MultiMap(keys={len(self.keys)}, values={len(self.values)}, sub_keys={self.sub_keys is not None})'
+
 
 # ______________________________________________________________________________________________________________________
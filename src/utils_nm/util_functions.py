@@ -5,46 +5,78 @@
 Functions which serve for general purposes
 """
 
+from __future__ import annotations
+
 from warnings import warn
 
 import os
 import sys
-import psutil
 from pathlib import Path
 
 import re
 
 import typing
 import inspect
+import copy
+import functools
+import itertools
+import collections
 
-from colorama import (
-    Fore,
-    Style,
-)
-
+import atexit
+import queue
 import logging
+import logging.handlers
 import warnings
 import traceback
 
 from datetime import datetime, timedelta
-from dateutil import parser as dateutil_parser
 
-import pandas as pd
+# heavy dependencies (numpy, pandas, psutil, colorama, dateutil) are imported inside the functions needing them,
+# so that importing this module stays cheap for short scripts
+if typing.TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from .util_classes import MultiMap
 
 
 # ______________________________________________________________________________________________________________________
 
 
-def inverse_non_unique_dict(d: dict) -> dict:
+def _is_instance_of(obj: typing.Any, module: str, *names: str) -> bool:
+    """
+    isinstance check against classes of a lazily imported module, which does not import the module.
+    If the module was never imported, obj cannot be an instance of its classes.
+
+    Args:
+        obj: the object to check
+        module: the module name, e.g. 'pandas'
+        *names: the class names within the module, e.g. 'DataFrame', 'Series'
+
+    Returns:
+        true if obj is an instance of one of the classes
+    """
+    mod = sys.modules.get(module)
+    return mod is not None and isinstance(obj, tuple(getattr(mod, name) for name in names))
+
+
+# ______________________________________________________________________________________________________________________
+
+
+def inverse_non_unique_dict(d: dict, compact: bool = False) -> dict | MultiMap:
     """
     Inverse a non-unique dict by using a list as values
 
     Args:
         d: input dictionary
+        compact: if true return a `util_classes.MultiMap` with array values instead of a dict of lists
 
     Returns:
         inverse dictionary
     """
+    if compact:
+        from .util_classes import MultiMap
+        return MultiMap.from_pairs(keys=d.values(), values=d.keys())
     result = dict()
     for key, value in d.items():
         result.setdefault(value, []).append(key)
@@ -81,16 +113,25 @@ def replace_none(obj: typing.Any, replacement: typing.Any) -> typing.Any:
 # ______________________________________________________________________________________________________________________
 
 
-def swap_dict_hierarchy(d: dict) -> dict:
+def swap_dict_hierarchy(d: dict, compact: bool = False) -> dict | MultiMap:
     """
     Swap the hierarchy of two levels of dict keys.
 
     Args:
         d:  input dictionary, must be of form {key1: {keyA: values,  keyB: values, ...}, key2: {keyA: values, ...}, ...}
+        compact: if true return a `util_classes.MultiMap` with sub keys instead of a dict of dicts,
+                    which contains all inner keys of all inner dicts
 
     Returns:
         new dict with swapped key hierarchy {keyA: {key1: values, key2: values, ...}, keyB: {key1, values, ...}, ...}
     """
+    if compact:
+        from .util_classes import MultiMap
+        return MultiMap.from_pairs(
+            keys=[key2 for inner in d.values() for key2 in inner],
+            values=[value for inner in d.values() for value in inner.values()],
+            sub_keys=[key1 for key1, inner in d.items() for _ in inner],
+        )
     return {key2: {key1: d[key1][key2] for key1 in d} for key2 in d[next(iter(d))]}
 
 
@@ -108,6 +149,8 @@ def print_yellow(*args, **kwargs) -> None:
     Returns:
         None, but prints the text in yellow
     """
+    from colorama import Fore, Style
+
     sep = kwargs.pop('sep', ' ')
     original_string = sep.join(str(stmt) for stmt in args)
     print(f'{Fore.YELLOW}{original_string}{Style.RESET_ALL}', **kwargs)
@@ -126,6 +169,8 @@ def input_yellow(prompt: str) -> str:
     Returns:
         the user input
     """
+    from colorama import Fore, Style
+
     return input(f'{Fore.YELLOW}{prompt}{Style.RESET_ALL}')
 
 
@@ -134,12 +179,26 @@ def input_yellow(prompt: str) -> str:
 
 def determine_main_script_path() -> str:
     """
-    Determines the path of the main script using psutil.Process().cmdline()
+    Determines the path of the main script from sys.argv, or the python executable in an interactive session.
+    Only if sys.argv is not available (e.g. embedded interpreters) psutil.Process().cmdline() is used.
+    The result is computed once per process, a forked child process determines its own.
 
     Returns:
-        a pathlib.Path object with the path to the main script
+        the path to the main script as string
     """
-    args = psutil.Process().cmdline()
+    return _determine_main_script_path(os.getpid())
+
+
+@functools.lru_cache(maxsize=1)
+def _determine_main_script_path(pid: int) -> str:
+    """determines the main script path of the process with the pid, cached by `determine_main_script_path`"""
+    argv = getattr(sys, 'argv', None)
+    if argv:
+        return argv[0] or sys.executable
+
+    import psutil
+
+    args = psutil.Process(pid).cmdline()
     if len(args) > 1:
         path = args[1]
     else:
@@ -203,25 +262,100 @@ def check_if_in_argv(arg, argument) -> bool:
 # ______________________________________________________________________________________________________________________
 
 
-def convert_to_datetime(s: str) -> datetime:
+def convert_to_datetime(s: str, cached: bool = False) -> datetime:
     """
     convert a string input to python native datetime object
 
     Args:
         s: input string
+        cached: if true, strings are parsed through a bounded lru cache, so repeated strings are only parsed once.
+                The hit / miss statistics are available with `convert_to_datetime_cache_info()`
 
     Returns:
         datetime object or pd.NaT if input is pd.isna()
     """
+    import pandas as pd
+
     if pd.isna(s):
         return pd.NaT
     elif isinstance(s, pd.Timestamp):
         return s.to_pydatetime()
     elif isinstance(s, datetime):
         return s
+    elif cached:
+        return _cached_dateutil_parse(s)
+    return _dateutil_parse(s)
+
+
+def _dateutil_parse(s: str) -> datetime:
+    """parses a string with dateutil, which is only imported on first use"""
+    from dateutil import parser as dateutil_parser
     return dateutil_parser.parse(s)
 
 
+_cached_dateutil_parse = functools.lru_cache(maxsize=2**16)(_dateutil_parse)
+
+
+def convert_to_datetime_cache_info() -> functools._CacheInfo:
+    """returns the hits, misses, maxsize and currsize of the cache used by `convert_to_datetime(..., cached=True)`"""
+    return _cached_dateutil_parse.cache_info()
+
+
+def convert_to_datetime_cache_clear() -> None:
+    """clears the cache used by `convert_to_datetime(..., cached=True)`"""
+    _cached_dateutil_parse.cache_clear()
+
+
+def convert_to_datetime_vectorized(
+        values: pd.Series | np.ndarray | list,
+        sample_size: int = 100,
+        unique: bool = None,
+) -> pd.Series:
+    """
+    vectorized counterpart of `convert_to_datetime` for many values.
+    The format is inferred from a sample of the strings and the bulk is parsed with pd.to_datetime in that format,
+    only the values which do not match the format are parsed one by one with dateutil.
+
+    Args:
+        values: the input values, strings, datetime objects or missing values
+        sample_size: the number of strings used to infer the format
+        unique: if true, only the distinct values are parsed and mapped back to all rows, which pays off for
+                repeated values. If None, it is decided by the share of distinct values in the sample
+
+    Returns:
+        datetime series (with the index of the input series), missing values become pd.NaT
+    """
+    import pandas as pd
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:  # pandas < 2.2
+        from pandas._libs.tslibs.parsing import guess_datetime_format
+
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    sample = series.dropna().head(sample_size)
+    if unique is None:
+        unique = len(sample) > 1 and sample.nunique() <= len(sample) // 2
+    if unique:
+        codes, uniques = pd.factorize(series)
+        parsed_uniques = convert_to_datetime_vectorized(pd.Series(uniques, dtype=object), sample_size, unique=False)
+        # code -1 marks missing values, which are filled with NaT
+        return pd.Series(parsed_uniques.array.take(codes, allow_fill=True), index=series.index)
+
+    formats = sample[sample.map(type) == str].map(guess_datetime_format).dropna()
+    datetime_format = formats.mode().iloc[0] if not formats.empty else None
+
+    parsed = pd.to_datetime(series, format=datetime_format, errors='coerce')
+    failed = parsed.isna() & series.notna()
+    if failed.any():
+        fallback = pd.to_datetime(series[failed].map(convert_to_datetime))
+        parsed = pd.concat([parsed[~failed], fallback]).reindex(series.index)
+
+    return parsed
+
+
 # ______________________________________________________________________________________________________________________
 
 
@@ -440,44 +574,175 @@ def determine_default_value_for_argparse(
 # ______________________________________________________________________________________________________________________
 
 
-def create_logger(name: str, log_file_path: str | Path = None) -> logging.Logger:
+# created handlers and queue listener per logger name, so create_logger does not stack duplicate handlers
+_logger_setups = {}
+
+
+def create_logger(
+        name: str,
+        log_file_path: str | Path = None,
+        use_queue: bool = False,
+        rotate_bytes: int = None,
+        rotate_when: str = None,
+        backup_count: int = 7,
+        compress: bool = False,
+        buffer_size: int = None,
+        log_format: typing.Literal['text', 'json'] = 'text',
+) -> logging.Logger:
     """
-    logger factory function
+    logger factory function, idempotent per logger name: calling it again with the same arguments returns the
+    logger unchanged, with other arguments the handlers of the previous call are replaced.
+    Useage of the non-blocking variant, the listener is stopped and flushed at interpreter exit:
+
+    >>> logger = create_logger('job', log_file_path='logs/job.log', use_queue=True)
+    >>> logger = create_logger('job', log_file_path='logs/job.jsonl', rotate_when='midnight', compress=True,
+    >>>                        buffer_size=1000, log_format='json')
 
     Args:
         name: the name of the logger
         log_file_path: the path to the logging file, if None, then no file handler will be added
+        use_queue: if true the logger only puts the records into a queue (`logging.handlers.QueueHandler`) and a
+                    background thread (`logging.handlers.QueueListener`) writes them to the console and file handler
+        rotate_bytes: (optional) rotate the logging file when it would exceed this size in bytes
+        rotate_when: (optional) rotate the logging file by time, e.g. 'midnight' or 'h', see
+                    `logging.handlers.TimedRotatingFileHandler`. Can not be combined with rotate_bytes
+        backup_count: the number of rotated files to keep
+        compress: if true the rotated files are gzip compressed and get the suffix .gz
+        buffer_size: (optional) buffer that many records and write them to the file in one batch, records of level
+                    error and above, as well as closing the logger, write the buffer immediately
+        log_format: 'text' for the plain format or 'json' for one json object per line
+                    (`util_classes.JsonLinesFormatter`) in the logging file
 
     Returns:
         an instance of a logger
     """
 
+    if rotate_bytes is not None and rotate_when is not None:
+        raise ValueError('only one of rotate_bytes and rotate_when can be set')
+    if log_format not in ('text', 'json'):
+        raise ValueError(f'log_format must be one of [ text | json ], but log_format was {log_format}')
+
+    if isinstance(log_file_path, str):
+        log_file_path = Path(log_file_path)
+    config = (log_file_path, use_queue, rotate_bytes, rotate_when, backup_count, compress, buffer_size, log_format)
+
     logger = logging.getLogger(name)
+    setup = _logger_setups.get(name)
+    if setup is not None:
+        if setup['config'] == config and all(handler in logger.handlers for handler in setup['attached']):
+            return logger
+        _remove_logger_setup(name)
     logger.setLevel(logging.DEBUG)
 
+    handlers = []
+    targets = []  # handlers only written to by other handlers
     logging_console_formatter = logging.Formatter('%(levelname)-8s | %(message)s')
     logging_console_handler = logging.StreamHandler()
     logging_console_handler.setLevel(logging.DEBUG)
     logging_console_handler.setFormatter(logging_console_formatter)
-    logger.addHandler(logging_console_handler)
+    handlers.append(logging_console_handler)
 
     if log_file_path is not None:
-        if isinstance(log_file_path, str):
-            log_file_path = Path(log_file_path)
         if not log_file_path.exists():
             log_file_path.parent.mkdir(parents=True, exist_ok=True)
             log_file_path.touch(exist_ok=True)
-        logging_file_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-8s | module: %(module)-25s | %(message)s'
-        )
-        logging_file_handler = logging.FileHandler(log_file_path)
+        if log_format == 'json':
+            from .util_classes import JsonLinesFormatter
+            logging_file_formatter = JsonLinesFormatter()
+        else:
+            logging_file_formatter = logging.Formatter(
+                '%(asctime)s | %(levelname)-8s | module: %(module)-25s | %(message)s'
+            )
+        if rotate_bytes is not None:
+            logging_file_handler = logging.handlers.RotatingFileHandler(
+                log_file_path, maxBytes=rotate_bytes, backupCount=backup_count
+            )
+        elif rotate_when is not None:
+            logging_file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_file_path, when=rotate_when, backupCount=backup_count
+            )
+        else:
+            logging_file_handler = logging.FileHandler(log_file_path)
+        if compress:
+            logging_file_handler.namer = _gzip_namer
+            logging_file_handler.rotator = _gzip_rotator
         logging_file_handler.setLevel(logging.INFO)
         logging_file_handler.setFormatter(logging_file_formatter)
-        logger.addHandler(logging_file_handler)
-
+        if buffer_size is not None:
+            logging_buffer_handler = logging.handlers.MemoryHandler(
+                buffer_size, flushLevel=logging.ERROR, target=logging_file_handler
+            )
+            logging_buffer_handler.setLevel(logging.INFO)
+            handlers.append(logging_buffer_handler)
+            targets.append(logging_file_handler)
+        else:
+            handlers.append(logging_file_handler)
+
+    listener = None
+    attached = handlers
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        attached = [_KeepExcInfoQueueHandler(log_queue)]
+    for handler in attached:
+        logger.addHandler(handler)
+
+    _logger_setups[name] = {
+        'config': config, 'attached': attached, 'handlers': handlers + targets, 'listener': listener
+    }
     return logger
 
 
+def _remove_logger_setup(name: str) -> None:
+    """stops the queue listener and removes and closes the handlers, which create_logger added to the logger"""
+    setup = _logger_setups.pop(name)
+    if setup['listener'] is not None:
+        setup['listener'].stop()
+    logger = logging.getLogger(name)
+    for handler in setup['attached']:
+        logger.removeHandler(handler)
+    for handler in dict.fromkeys(setup['attached'] + setup['handlers']):  # buffers are closed before their targets
+        handler.close()
+
+
+class _KeepExcInfoQueueHandler(logging.handlers.QueueHandler):
+    """
+    queue handler of create_logger, which keeps exc_info and stack_info of the records instead of merging the
+    traceback into the message, so the formatters of the listener (e.g. the exception field of JsonLinesFormatter)
+    format them as without queue. The queue lives in the same process, so the records need not be picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    """names the rotated logging files of create_logger with the suffix .gz"""
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """compresses the rotated logging file of create_logger with gzip and removes the uncompressed file"""
+    import gzip
+    import shutil
+
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+@atexit.register
+def _stop_logger_queue_listeners() -> None:
+    """stops the queue listeners of create_logger at interpreter exit, which writes all records still queued"""
+    for setup in _logger_setups.values():
+        if setup['listener'] is not None:
+            setup['listener'].stop()
+            setup['listener'] = None
+
+
 # ______________________________________________________________________________________________________________________
 
 
@@ -513,19 +778,150 @@ def format_email_error_message(exception: Exception, project: str, wd: Path, log
 # ______________________________________________________________________________________________________________________
 
 
-def chunker(seq: typing.Sequence, size: int) -> typing.Generator:
+def chunker(seq: typing.Iterable, size: int = None, max_bytes: int = None) -> typing.Generator:
     """
-    creates a generator object of the sequence in fixed size chunks
+    creates a generator object of the sequence in fixed size chunks.
+    NumPy arrays, pandas objects (via iloc) and bytes like objects (via memoryview) are chunked into zero-copy views,
+    strings, lists, tuples and ranges into slices and any other iterable, e.g. a generator, deque, dict (its keys)
+    or db cursor, into lists.
 
     Args:
-        seq: the input sequence
-        size: the chunk size (last chunk will only contain the leftover)
+        seq: the input sequence or iterable
+        size: the chunk size in elements / rows (last chunk will only contain the leftover)
+        max_bytes: the maximum chunk size in bytes, for arrays, pandas objects and buffers derived from the average
+                    size per row (including the python objects of object and string columns), else summed up from
+                    `sys.getsizeof` per element. A chunk has at least one element
 
     Returns:
         generator object with chunked sequence elements of the specified size
     """
 
-    return (seq[pos:pos + size] for pos in range(0, len(seq), size))
+    if size is None and max_bytes is None:
+        raise ValueError('at least one of size or max_bytes needs to be set')
+    if (size is not None and size < 1) or (max_bytes is not None and max_bytes < 1):
+        raise ValueError(f'size and max_bytes need to be positive integers, but were {size} and {max_bytes}')
+
+    if isinstance(seq, (bytes, bytearray)):
+        seq = memoryview(seq)
+    is_pandas = _is_instance_of(seq, 'pandas', 'DataFrame', 'Series')
+    if is_pandas or isinstance(seq, memoryview) or _is_instance_of(seq, 'numpy', 'ndarray'):
+        n_rows = len(seq)
+        if n_rows == 0:
+            return (_ for _ in ())
+        if max_bytes is not None:
+            if is_pandas:
+                # deep, so object and string columns count with the size of their python objects
+                n_bytes = seq.memory_usage(index=False, deep=True)
+                n_bytes = n_bytes.sum() if seq.ndim == 2 else n_bytes
+            elif isinstance(seq, memoryview) or seq.dtype != object:
+                n_bytes = seq.nbytes
+            else:
+                n_bytes = seq.nbytes + sum(sys.getsizeof(el) for el in seq.flat)
+            rows_per_chunk = max(1, int(max_bytes // (n_bytes / n_rows))) if n_bytes > 0 else n_rows
+            size = rows_per_chunk if size is None else min(size, rows_per_chunk)
+        view = seq.iloc if is_pandas else seq
+        return (view[pos:pos + size] for pos in range(0, n_rows, size))
+
+    # only these are known to support slicing, e.g. a deque is a sequence, but can not be sliced
+    if isinstance(seq, (str, list, tuple, range)):
+        if max_bytes is None:
+            return (seq[pos:pos + size] for pos in range(0, len(seq), size))
+        return (seq[start:end] for start, end in _chunk_bounds(seq, size, max_bytes))
+
+    return _chunk_iterable(seq, size, max_bytes)
+
+
+def parallel_map_chunks(
+        fn: typing.Callable,
+        seq: typing.Iterable,
+        size: int = None,
+        max_bytes: int = None,
+        executor: typing.Literal['thread', 'process'] = 'thread',
+        max_workers: int = None,
+        max_in_flight: int = None,
+        progress: typing.Callable[[int], typing.Any] = None,
+) -> typing.Generator:
+    """
+    maps a function over the chunks of `chunker(seq, size, max_bytes)` in a thread or process pool.
+    At most max_in_flight chunks are submitted and not yet consumed, so the input is read lazily and memory stays
+    bounded (backpressure). The results are yielded in the order of the chunks, as soon as they are available.
+    Useage:
+
+    >>> with tqdm() as progress_bar:
+    >>>     results = list(parallel_map_chunks(fn, seq, 10000, executor='process', progress=progress_bar.update))
+
+    Args:
+        fn: the function applied to every chunk, must be picklable for the process executor
+        seq: the input sequence or iterable
+        size: the chunk size in elements / rows, see `chunker`
+        max_bytes: the maximum chunk size in bytes, see `chunker`
+        executor: whether to use a thread or a process pool
+        max_workers: the number of workers, defaults to the number of cpus
+        max_in_flight: the maximum number of submitted and not yet consumed chunks, defaults to 2 * max_workers
+        progress: (optional) tqdm style callback, called with 1 for every finished chunk
+
+    Returns:
+        generator object with the results of fn per chunk
+    """
+
+    if executor not in ('thread', 'process'):
+        raise ValueError(f'executor needs to be one of [ thread | process ], but executor was {executor}')
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max_workers
+    if executor == 'thread':
+        from concurrent.futures import ThreadPoolExecutor as pool_class
+    else:
+        from concurrent.futures import ProcessPoolExecutor as pool_class
+
+    with pool_class(max_workers=max_workers) as pool:
+        pending = collections.deque()
+        try:
+            for chunk in chunker(seq, size, max_bytes):
+                future = pool.submit(fn, chunk)
+                if progress is not None:
+                    future.add_done_callback(lambda _: progress(1))
+                pending.append(future)
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # the consumer stopped early or fn raised, so the remaining chunks are not needed anymore
+            for future in pending:
+                future.cancel()
+
+
+def _chunk_bounds(seq: typing.Iterable, size: int | None, max_bytes: int) -> typing.Generator:
+    """yields the (start, end) positions of chunks, which are limited by element count and summed sys.getsizeof"""
+    start, chunk_bytes = 0, 0
+    for pos, el in enumerate(seq):
+        el_bytes = sys.getsizeof(el)
+        if pos > start and (chunk_bytes + el_bytes > max_bytes or (size is not None and pos - start >= size)):
+            yield start, pos
+            start, chunk_bytes = pos, 0
+        chunk_bytes += el_bytes
+    if chunk_bytes:
+        yield start, len(seq)
+
+
+def _chunk_iterable(iterable: typing.Iterable, size: int | None, max_bytes: int | None) -> typing.Generator:
+    """batches an arbitrary iterable into lists, consuming it only once"""
+    iterator = iter(iterable)
+    if max_bytes is None:
+        while chunk := list(itertools.islice(iterator, size)):
+            yield chunk
+    else:
+        chunk, chunk_bytes = [], 0
+        for el in iterator:
+            el_bytes = sys.getsizeof(el)
+            if chunk and (chunk_bytes + el_bytes > max_bytes or (size is not None and len(chunk) >= size)):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append(el)
+            chunk_bytes += el_bytes
+        if chunk:
+            yield chunk
 
 
 # ______________________________________________________________________________________________________________________
@@ -534,6 +930,7 @@ def chunker(seq: typing.Sequence, size: int) -> typing.Generator:
 def split_text(text: str, n_chars: int = 50):
     """
     inserts `\n` into a long text at the first whitespace before `n_chars`.
+    Words longer than `n_chars` are broken at `n_chars`.
 
     Args:
         text: the input text
@@ -543,27 +940,63 @@ def split_text(text: str, n_chars: int = 50):
         text with `\n` inserted
     """
 
-    result = ''
-    start = 0
-    while True:
-        # loop exit condition
-        if len(text[start:]) <= n_chars:
-            result += text[start:]
-            break
+    if n_chars < 1:
+        raise ValueError(f'n_chars needs to be a positive integer, but n_chars was {n_chars}')
 
-        # set the scope to analyse
-        sub_text = text[start:start+n_chars]
+    lines = []
+    start = 0
+    end = len(text)
+    if end > n_chars:
+        # whitespace at a line start is dropped, as it would only indent the first line or become an empty line
+        while start < end and text[start] == ' ':
+            start += 1
+    while end - start > n_chars:
+        # first find the nearest whitespace to the end of the scope text[start:start + n_chars], a whitespace
+        # directly after the scope is a valid break point as well, since it is dropped and not part of the line
+        ws_pos = text.rfind(' ', start, start + n_chars + 1)
+
+        if ws_pos == -1:
+            # no whitespace in the scope, so the word is broken (the char after the scope is no whitespace either,
+            # so the next line does not start with the separating whitespace)
+            lines.append(text[start:start + n_chars])
+            start += n_chars
+        else:
+            # break before the whole run of whitespace and continue after it
+            line_end = ws_pos
+            while text[line_end - 1] == ' ':
+                line_end -= 1
+            lines.append(text[start:line_end])
+            start = ws_pos + 1
+            while start < end and text[start] == ' ':
+                start += 1
+    if not lines:
+        lines.append(text[start:])
+    elif text[start:].rstrip(' '):
+        # trailing whitespace of a broken text is dropped like the whitespace at the breaks
+        lines.append(text[start:].rstrip(' '))
+
+    return '\n'.join(lines)
+
+
+def split_text_batch(texts: list[str] | pd.Series, n_chars: int = 50) -> list[str] | pd.Series:
+    """
+    applies `split_text` to many texts, texts which already fit into one line are passed through untouched
 
-        # first find the nearest whitespace to the end of text[:n_chars]
-        ws_pos = sub_text.rfind(' ')
+    Args:
+        texts: list or series of input texts, missing values in a series are kept
+        n_chars: the maximum number of chars per line
 
-        # assembling the result string
-        result += text[start:start+ws_pos] + '\n'
+    Returns:
+        list or series (with the index of the input series) of texts with `\n` inserted
+    """
 
-        # setting the new start point
-        start = start + ws_pos + 1
+    if _is_instance_of(texts, 'pandas', 'Series'):
+        result = texts.copy()
+        too_long = texts.str.len() > n_chars
+        result[too_long] = [split_text(text, n_chars) for text in texts[too_long]]
+        return result
 
-    return result if result != '' else text
+    return [split_text(text, n_chars) if len(text) > n_chars else text for text in texts]
 
 
 # ______________________________________________________________________________________________________________________
@@ -584,6 +1017,35 @@ def last_day_of_month(any_date: datetime.date) -> datetime.date:
     return next_month - timedelta(days=next_month.day)
 
 
+def _to_datetime64_days(dates: pd.Series | np.ndarray | list) -> np.ndarray:
+    """converts dates of a series, array or list to a datetime64[D] array"""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(dates, pd.Series):
+        return pd.to_datetime(dates).to_numpy().astype('datetime64[D]')
+    return np.asarray(dates, dtype='datetime64[D]')
+
+
+def last_day_of_month_vectorized(dates: pd.Series | np.ndarray | list) -> pd.Series | np.ndarray:
+    """
+    vectorized counterpart of `last_day_of_month` using datetime64 month arithmetic
+
+    Args:
+        dates: the input dates, missing values become NaT
+
+    Returns:
+        datetime series (with the index of the input series) or datetime64[D] array of the last days of the months
+    """
+    import pandas as pd
+
+    days = _to_datetime64_days(dates)
+    result = (days.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+    if isinstance(dates, pd.Series):
+        return pd.Series(result.astype('datetime64[ns]'), index=dates.index, name=dates.name)
+    return result
+
+
 # ______________________________________________________________________________________________________________________
 
 
@@ -600,6 +1062,82 @@ def date_to_integer(any_date: datetime.date) -> int:
     return (10000 * any_date.year) + (100 * any_date.month) + any_date.day
 
 
+def date_to_integer_vectorized(dates: pd.Series | np.ndarray | list) -> pd.Series | np.ndarray:
+    """
+    vectorized counterpart of `date_to_integer` using datetime64 arithmetic
+
+    Args:
+        dates: the dates which should be converted to int, only a series may contain missing values
+
+    Returns:
+        Int64 series (with the index of the input series, missing values become <NA>) or int64 array
+    """
+    import numpy as np
+    import pandas as pd
+
+    days = _to_datetime64_days(dates)
+    missing = np.isnat(days)
+    if missing.any() and not isinstance(dates, pd.Series):
+        raise ValueError('dates contain missing values, pass a pandas series to get <NA> for them')
+
+    months = days.astype('datetime64[M]')
+    result = (
+        10000 * (days.astype('datetime64[Y]').astype(np.int64) + 1970)
+        + 100 * (months.astype(np.int64) % 12 + 1)
+        + (days - months).astype(np.int64) + 1
+    )
+    if isinstance(dates, pd.Series):
+        return pd.Series(pd.arrays.IntegerArray(result, missing), index=dates.index, name=dates.name)
+    return result
+
+
+def integer_to_date(any_int: int) -> datetime.date:
+    """
+    converts an integer of the form yyyymmdd to a date object, inverse of `date_to_integer`
+
+    Args:
+        any_int: the integer which should be converted to date
+
+    Returns:
+        date object
+    """
+    return datetime(any_int // 10000, any_int // 100 % 100, any_int % 100).date()
+
+
+def integer_to_date_vectorized(ints: pd.Series | np.ndarray | list) -> pd.Series | np.ndarray:
+    """
+    vectorized counterpart of `integer_to_date` using datetime64 arithmetic
+
+    Args:
+        ints: integers of the form yyyymmdd, only a series may contain missing values
+
+    Returns:
+        datetime series (with the index of the input series, missing values become NaT) or datetime64[D] array
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(ints, pd.Series):
+        missing = ints.isna().to_numpy()
+        values = ints.fillna(19700101).to_numpy(dtype=np.int64)
+    else:
+        values = np.asarray(ints, dtype=np.int64)
+        missing = np.zeros(values.shape, dtype=bool)
+
+    years, months, days = values // 10000, values // 100 % 100, values % 100
+    month_starts = (years - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (months - 1)
+    days_in_month = ((month_starts + 1).astype('datetime64[D]') - month_starts.astype('datetime64[D]')).astype(np.int64)
+    invalid = ~missing & ((months < 1) | (months > 12) | (days < 1) | (days > days_in_month))
+    if invalid.any():
+        raise ValueError(f'ints contain invalid dates, e.g. {values[invalid][0]}')
+
+    result = month_starts.astype('datetime64[D]') + (days - 1)
+    result[missing] = np.datetime64('NaT')
+    if isinstance(ints, pd.Series):
+        return pd.Series(result.astype('datetime64[ns]'), index=ints.index, name=ints.name)
+    return result
+
+
 # ______________________________________________________________________________________________________________________
 
 
@@ -644,54 +1182,77 @@ def display_formatted_time(seconds: int, granularity: str = 's') -> str:
 # ______________________________________________________________________________________________________________________
 
 
-def clean_umlauts(s: str | list) -> str | list:
+UMLAUT_TRANSLATIONS = {
+    'Ä': 'Ae',
+    'Ü': 'Ue',
+    'Ö': 'Oe',
+    'É': 'E',
+    'È': 'E',
+    'À': 'A',
+    'Ó': 'O',
+    'Â': 'A',
+    'Ê': 'e',
+    'Ç': 'C',
+    'Ć': 'C',
+    'Č': 'C',
+    'Ë': 'E',
+
+    'ä': 'ae',
+    'ü': 'ue',
+    'ö': 'oe',
+    'é': 'e',
+    'è': 'e',
+    'à': 'a',
+    'ó': 'o',
+    'â': 'a',
+    'ê': 'e',
+    'ç': 'c',
+    'ć': 'c',
+    'č': 'c',
+    'ë': 'e',
+}
+
+_umlaut_table = str.maketrans(UMLAUT_TRANSLATIONS)
+
+
+def _clean_umlauts_chunk(chunk: list) -> list:
+    """translates the umlauts of a list of strings, used as worker function by `clean_umlauts`"""
+    return [el.translate(_umlaut_table) for el in chunk]
+
+
+def clean_umlauts(
+        s: str | list | pd.Series,
+        n_jobs: int = 1,
+        chunk_size: int = 100000,
+) -> str | list | pd.Series:
     """
-    replaces some German, French, Slavic umlauts to plain english characters
+    replaces some German, French, Slavic umlauts to plain english characters.
+    All umlauts are replaced in one pass with a precompiled translation table.
 
     Args:
-        s: the input string or list of strings
+        s: the input string, list of strings or series of strings
+        n_jobs: the number of processes to translate a list in chunks in parallel, only used for lists longer than
+                chunk_size
+        chunk_size: the number of list elements per chunk
 
     Returns:
         input object with replaced umlauts
     """
 
     warn('deprecation warning: use unidecode instead. Install it with >>> pip install unidecode')
-    d_trans = {
-        'Ä': 'Ae',
-        'Ü': 'Ue',
-        'Ö': 'Oe',
-        'É': 'E',
-        'È': 'E',
-        'À': 'A',
-        'Ó': 'O',
-        'Â': 'A',
-        'Ê': 'e',
-        'Ç': 'C',
-        'Ć': 'C',
-        'Č': 'C',
-        'Ë': 'E',
-
-        'ä': 'ae',
-        'ü': 'ue',
-        'ö': 'oe',
-        'é': 'e',
-        'è': 'e',
-        'à': 'a',
-        'ó': 'o',
-        'â': 'a',
-        'ê': 'e',
-        'ç': 'c',
-        'ć': 'c',
-        'č': 'c',
-        'ë': 'e',
-    }
 
-    for key, val in d_trans.items():
-        if isinstance(s, str):
-            s = s.replace(key, val)
+    if isinstance(s, str):
+        s = s.translate(_umlaut_table)
+
+    elif _is_instance_of(s, 'pandas', 'Series'):
+        s = s.str.translate(_umlaut_table)
 
-        elif isinstance(s, list):
-            s = [el.replace(key, val) for el in s]
+    elif isinstance(s, list):
+        if n_jobs > 1 and len(s) > chunk_size:
+            chunks = parallel_map_chunks(_clean_umlauts_chunk, s, chunk_size, executor='process', max_workers=n_jobs)
+            s = list(itertools.chain.from_iterable(chunks))
+        else:
+            s = _clean_umlauts_chunk(s)
 
     return s
 
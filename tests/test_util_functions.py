@@ -0,0 +1,76 @@
+# test_util_functions.py
+# -*- coding: utf-8 -*-
+
+"""
+Regression tests for util_functions
+"""
+
+import collections
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils_nm.util_functions import chunker, split_text
+
+
+# ______________________________________________________________________________________________________________________
+
+
+@pytest.mark.parametrize('text, n_chars, expected', [
+    ('abcde fghij', 5, 'abcde\nfghij'),
+    ('x' * 12 + ' tail', 6, 'xxxxxx\nxxxxxx\ntail'),
+    ('abcdefgh', 3, 'abc\ndef\ngh'),
+    ('ab cd ef', 5, 'ab cd\nef'),
+    ('short', 50, 'short'),
+    ('abcde  fghij', 5, 'abcde\nfghij'),
+    (' abcdefgh', 4, 'abcd\nefgh'),
+    ('ab  cd', 3, 'ab\ncd'),
+    ('abcde     ', 5, 'abcde'),
+])
+def test_split_text(text, n_chars, expected):
+    assert split_text(text, n_chars) == expected
+
+
+def test_split_text_lines_fit_without_blank_lines_or_leading_spaces():
+    words = ['abcde', 'x' * 17, 'fg', 'hijklm', 'nopqr'] * 20
+    for text in (' '.join(words), '  '.join(words), ' ' + ' '.join(words), '   '.join(words) + '  '):
+        for n_chars in range(1, 25):
+            result = split_text(text, n_chars)
+            lines = result.split('\n')
+            assert all(0 < len(line) <= n_chars for line in lines)
+            assert not any(line.startswith(' ') or line.endswith(' ') for line in lines)
+            assert ''.join(result.split()) == ''.join(text.split())
+
+
+# ______________________________________________________________________________________________________________________
+
+
+@pytest.mark.parametrize('make_empty', [
+    lambda: np.array([]),
+    lambda: pd.DataFrame({'a': []}),
+    lambda: pd.Series([], dtype=object),
+    lambda: b'',
+])
+def test_chunker_empty_input_with_max_bytes(make_empty):
+    assert list(chunker(make_empty(), max_bytes=3)) == []
+
+
+def test_chunker_max_bytes_counts_strings_deep():
+    df = pd.DataFrame({'text': ['x' * 1000] * 100})
+    chunks = list(chunker(df, max_bytes=10000))
+    assert len(chunks) > 10
+    assert sum(len(chunk) for chunk in chunks) == 100
+
+
+@pytest.mark.parametrize('seq, expected', [
+    (collections.deque([1, 2, 3]), [[1, 2], [3]]),
+    ({'a': 1, 'b': 2, 'c': 3}, [['a', 'b'], ['c']]),
+    ({1, 2}, [[1, 2]]),
+    ((i for i in range(3)), [[0, 1], [2]]),
+    ([1, 2, 3], [[1, 2], [3]]),
+    ('abc', ['ab', 'c']),
+    (range(3), [range(0, 2), range(2, 3)]),
+])
+def test_chunker_iterables(seq, expected):
+    assert list(chunker(seq, 2)) == expected
@@ -0,0 +1,40 @@
+# test_util_gui_classes.py
+# -*- coding: utf-8 -*-
+
+"""
+Smoke tests for util_gui_classes, customtkinter is replaced by a stub module, so no display is needed
+"""
+
+import sys
+import types
+
+import pytest
+
+from utils_nm import util_gui_classes
+
+
+# ______________________________________________________________________________________________________________________
+
+
+@pytest.fixture
+def stub_customtkinter(monkeypatch):
+    stub = types.ModuleType('customtkinter')
+    stub.CTk = type('CTk', (), {})
+    stub.CTkToplevel = type('CTkToplevel', (), {})
+    monkeypatch.setitem(sys.modules, 'customtkinter', stub)
+    util_gui_classes._gui_prompt_yes_no_class.cache_clear()
+    yield stub
+    util_gui_classes._gui_prompt_yes_no_class.cache_clear()
+
+
+def test_gui_prompt_yes_no_exposes_methods(stub_customtkinter):
+    gui_prompt_yes_no = util_gui_classes.GuiPromptYesNo
+    assert issubclass(gui_prompt_yes_no, stub_customtkinter.CTkToplevel)
+    for name in ('equal_weighted_grid', 'button_event', 'countdown', 'stop_after_callbacks', 'on_closing',
+                 'terminate'):
+        assert name in gui_prompt_yes_no.__dict__
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        util_gui_classes.NoSuchClass